@@ -6,34 +6,7 @@ from pydantic import BaseModel, Field
 import tempfile
 import re
 from app import generate_questions
-
-# 定義有效的題型
-type_map = {
-    "單選選擇題": {
-        "zh-Hant": "單選選擇題（每題四個選項）",
-        "zh-Hans": "单选选择题（每题四个选项）",
-        "en": "single choice question (4 options)",
-        "ja": "四択問題"
-    },
-    "多選選擇題": {
-        "zh-Hant": "多選選擇題（每題四到五個選項）",
-        "zh-Hans": "多选选择题（每题四到五个选项）",
-        "en": "multiple choice question (4-5 options)",
-        "ja": "複数選択問題"
-    },
-    "問答題": {
-        "zh-Hant": "簡答題",
-        "zh-Hans": "简答题",
-        "en": "short answer",
-        "ja": "短答式問題"
-    },
-    "申論題": {
-        "zh-Hant": "申論題",
-        "zh-Hans": "申论题",
-        "en": "essay question",
-        "ja": "記述式問題"
-    }
-}
+from prompts import validate_request
 
 class QuestionItem(BaseModel):
     number: str = Field(..., description="題號")
@@ -90,6 +63,15 @@ async def api_generate(
     llm_key: Optional[str] = Form(None, description="LLM 金鑰（可選，未填則用 .env）"),
     baseurl: Optional[str] = Form(None, description="API Base URL（可選，未填則用 .env）")
 ):
+    # 先檢查題型與語言，無效時直接回傳 400，不寫入臨時檔案
+    try:
+        lang, types = validate_request(question_types, lang)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"detail": str(e)}
+        )
+
     temp_files = []
     import os
     for f in files:
@@ -101,7 +83,7 @@ async def api_generate(
         temp.name = temp.name
 
     result, raw_text = generate_questions(
-        temp_files, question_types, num_questions, lang, llm_key, baseurl
+        temp_files, types, num_questions, lang, llm_key, baseurl
     )
 
     for temp in temp_files:
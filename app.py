@@ -5,6 +5,7 @@ import tempfile
 import logging
 from dotenv import load_dotenv
 from markitdown import MarkItDown
+from prompts import validate_request, build_prompt, types_label
 
 # 配置日誌
 logging.basicConfig(
@@ -85,6 +86,12 @@ def extract_text_from_files(files, llm_key=None, baseurl=None, model_name=None):
 
 def generate_questions(files, question_types, num_questions, lang, llm_key, baseurl, model=None):
     try:
+        # 先檢查題型與語言，無效時不必處理文件
+        try:
+            lang, question_types = validate_request(question_types, lang)
+        except ValueError as e:
+            return {"error": str(e)}, ""
+
         # 優先使用 UI 傳入值，否則用 .env，最後才用默認值
         key = llm_key if llm_key else os.getenv("OPENAI_API_KEY")
         base = baseurl if baseurl else os.getenv("OPENAI_API_BASE")
@@ -101,143 +108,9 @@ def generate_questions(files, question_types, num_questions, lang, llm_key, base
             return {"error": "⚠️ 請輸入 LLM key 與 baseurl"}, ""
         client = OpenAI(api_key=key, base_url=base)
 
-        type_map = {
-            "單選選擇題": {
-                "zh-Hant": "單選選擇題（每題四個選項）",
-                "zh-Hans": "单选选择题（每题四个选项）",
-                "en": "single choice question (4 options)",
-                "ja": "四択問題"
-            },
-            "多選選擇題": {
-                "zh-Hant": "多選選擇題（每題四到五個選項）",
-                "zh-Hans": "多选选择题（每题四到五个选项）",
-                "en": "multiple choice question (4-5 options)",
-                "ja": "複数選択問題"
-            },
-            "問答題": {
-                "zh-Hant": "簡答題",
-                "zh-Hans": "简答题",
-                "en": "short answer",
-                "ja": "短答式問題"
-            },
-            "申論題": {
-                "zh-Hant": "申論題",
-                "zh-Hans": "申论题",
-                "en": "essay question",
-                "ja": "記述式問題"
-            }
-        }
-
-        # 修改提示詞，要求 LLM 直接產出結構化的題目和答案
-        prompt_map = {
-            "繁體中文": """你是一位專業的出題者，請根據以下內容，設計 {n} 題以下類型的題目：{types}。
-
-請注意：你必須嚴格遵循指定的題型，如果要求是「單選選擇題」，就必須生成單選題，每題有四個選項(A,B,C,D)，而且只有一個正確答案。
-如果要求是「多選選擇題」，就必須生成多選題，每題有四到五個選項，可以有多個正確答案。
-如果要求是「問答題」，就必須生成簡答題，需要簡短的文字回答。
-如果要求是「申論題」，就必須生成需要較長篇幅回答的開放式問題。
-
-請嚴格按照以下格式輸出每個題目和答案：
-
-題目1：[題目內容]
-答案1：[答案內容]
-
-題目2：[題目內容]
-答案2：[答案內容]
-
-...以此類推
-
-請確保題號和答案號一一對應，不要使用其他格式。內容如下：
-{text}""",
-            "簡體中文": """你是一位专业的出题者，请根据以下内容，设计 {n} 题以下类型的题目：{types}。
-
-请注意：你必须严格遵循指定的题型，如果要求是「单选选择题」，就必须生成单选题，每题有四个选项(A,B,C,D)，而且只有一个正确答案。
-如果要求是「多选选择题」，就必须生成多选题，每题有四到五个选项，可以有多个正确答案。
-如果要求是「问答题」，就必须生成简答题，需要简短的文字回答。
-如果要求是「申论题」，就必须生成需要较长篇幅回答的开放式问题。
-
-请严格按照以下格式输出每个题目和答案：
-
-题目1：[题目内容]
-答案1：[答案内容]
-
-题目2：[题目内容]
-答案2：[答案内容]
-
-...以此类推
-
-请确保题号和答案号一一对应，不要使用其他格式。内容如下：
-{text}""",
-            "English": """You are a professional exam writer. Based on the following content, generate {n} questions of types: {types}.
-
-IMPORTANT: You must strictly follow the specified question types:
-- If "single choice question" is requested, create multiple choice questions with four options (A,B,C,D) and only ONE correct answer.
-- If "multiple choice question" is requested, create questions with 4-5 options where MORE THAN ONE option can be correct.
-- If "short answer" is requested, create questions requiring brief text responses.
-- If "essay question" is requested, create open-ended questions requiring longer responses.
-
-Please strictly follow this format for each question and answer:
-
-Question1: [question content]
-Answer1: [answer content]
-
-Question2: [question content]
-Answer2: [answer content]
-
-...and so on
-
-Ensure that question numbers and answer numbers correspond exactly. Do not use any other format. Content:
-{text}""",
-            "日本語": """あなたはプロの出題者です。以下の内容に基づいて、{types}を含む{n}問の問題を作成してください。
-
-重要：指定された問題タイプを厳守してください：
-- 「四択問題」が要求された場合、4つの選択肢（A,B,C,D）があり、正解が1つだけの選択問題を作成してください。
-- 「複数選択問題」が要求された場合、4〜5つの選択肢があり、複数の正解がある問題を作成してください。
-- 「短答式問題」が要求された場合、簡潔な文章での回答が必要な問題を作成してください。
-- 「記述式問題」が要求された場合、より長い回答が必要な開放型の問題を作成してください。
-
-以下の形式で各問題と回答を出力してください：
-
-問題1：[問題内容]
-回答1：[回答内容]
-
-問題2：[問題内容]
-回答2：[回答内容]
-
-...など
-
-問題番号と回答番号が正確に対応していることを確認してください。他の形式は使用しないでください。内容：
-{text}"""
-        }
-
-        lang_key_map = {
-            "繁體中文": "zh-Hant",
-            "簡體中文": "zh-Hans",
-            "English": "en",
-            "日本語": "ja"
-        }
-
-        lang_key = lang_key_map[lang]
-        
-        # 處理字串形式的 question_types（來自 API）
-        if isinstance(question_types, str):
-            # 先用逗號分隔，再用頓號分隔
-            qt_list = []
-            for part in question_types.split(","):
-                for subpart in part.split("、"):
-                    if subpart.strip():
-                        qt_list.append(subpart.strip())
-            question_types = qt_list
-        
-        # 檢查每個題型是否有效
-        valid_types = list(type_map.keys())
-        for t in question_types:
-            if t not in valid_types:
-                return {"error": f"⚠️ 無效的題型：{t}。有效題型為：{', '.join(valid_types)}"}, ""
-        
         try:
-            types_str = "、".join([type_map[t][lang_key] for t in question_types])
-            prompt = prompt_map[lang].format(n=num_questions, types=types_str, text=trimmed_text)
+            prompt = build_prompt(question_types, lang, num_questions, trimmed_text)
+            types_str = types_label(question_types, lang)
         except Exception as e:
             return {"error": f"⚠️ 處理題型時發生錯誤：{str(e)}。question_types={question_types}"}, ""
 
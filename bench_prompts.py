@@ -0,0 +1,44 @@
+# 提示詞組合的微基準測試：比較每次請求重建對照表與使用預先編譯的提示詞
+# 執行：python bench_prompts.py
+import timeit
+
+from prompts import (
+    TYPE_MAP, LANG_KEY_MAP, DEFAULT_PROMPTS, build_prompt, validate_request
+)
+
+TEXT = "測試內容 " * 20000  # 約 100KB 文本，接近實際請求
+QUESTION_TYPES = "單選選擇題,問答題"
+LANG = "繁體中文"
+NUMBER = 2000
+
+
+def build_per_request():
+    # 原本 generate_questions 的作法：每次請求都重建對照表並拆分題型
+    type_map = {t: dict(names) for t, names in TYPE_MAP.items()}
+    prompt_map = dict(DEFAULT_PROMPTS)
+    lang_key_map = dict(LANG_KEY_MAP)
+    qt_list = []
+    for part in QUESTION_TYPES.split(","):
+        for subpart in part.split("、"):
+            if subpart.strip():
+                qt_list.append(subpart.strip())
+    for t in qt_list:
+        if t not in type_map:
+            raise ValueError(t)
+    types_str = "、".join([type_map[t][lang_key_map[LANG]] for t in qt_list])
+    return prompt_map[LANG].format(n=10, types=types_str, text=TEXT)
+
+
+def build_precompiled():
+    return build_prompt(QUESTION_TYPES, LANG, 10, TEXT)
+
+
+def validate_only():
+    return validate_request(QUESTION_TYPES, LANG)
+
+
+if __name__ == "__main__":
+    assert build_per_request() == build_precompiled()
+    for name, fn in [("每次重建", build_per_request), ("預先編譯", build_precompiled), ("請求檢查", validate_only)]:
+        best = min(timeit.repeat(fn, number=NUMBER, repeat=5))
+        print(f"{name}: {best / NUMBER * 1e6:.2f} µs/次")
@@ -0,0 +1,330 @@
+import os
+import time
+import logging
+import string
+import threading
+from itertools import combinations
+from functools import lru_cache
+from types import MappingProxyType
+
+logger = logging.getLogger('pdf2quiz')
+
+# ✅ 題型與語言對照表（模組層級、唯讀，UI 與 API 共用）
+
+TYPE_MAP = MappingProxyType({
+    "單選選擇題": MappingProxyType({
+        "zh-Hant": "單選選擇題（每題四個選項）",
+        "zh-Hans": "单选选择题（每题四个选项）",
+        "en": "single choice question (4 options)",
+        "ja": "四択問題"
+    }),
+    "多選選擇題": MappingProxyType({
+        "zh-Hant": "多選選擇題（每題四到五個選項）",
+        "zh-Hans": "多选选择题（每题四到五个选项）",
+        "en": "multiple choice question (4-5 options)",
+        "ja": "複数選択問題"
+    }),
+    "問答題": MappingProxyType({
+        "zh-Hant": "簡答題",
+        "zh-Hans": "简答题",
+        "en": "short answer",
+        "ja": "短答式問題"
+    }),
+    "申論題": MappingProxyType({
+        "zh-Hant": "申論題",
+        "zh-Hans": "申论题",
+        "en": "essay question",
+        "ja": "記述式問題"
+    })
+})
+
+LANG_KEY_MAP = MappingProxyType({
+    "繁體中文": "zh-Hant",
+    "簡體中文": "zh-Hans",
+    "English": "en",
+    "日本語": "ja"
+})
+
+VALID_TYPES = tuple(TYPE_MAP.keys())
+VALID_LANGS = tuple(LANG_KEY_MAP.keys())
+
+# 要求 LLM 直接產出結構化的題目和答案
+DEFAULT_PROMPTS = MappingProxyType({
+    "繁體中文": """你是一位專業的出題者，請根據以下內容，設計 {n} 題以下類型的題目：{types}。
+
+請注意：你必須嚴格遵循指定的題型，如果要求是「單選選擇題」，就必須生成單選題，每題有四個選項(A,B,C,D)，而且只有一個正確答案。
+如果要求是「多選選擇題」，就必須生成多選題，每題有四到五個選項，可以有多個正確答案。
+如果要求是「問答題」，就必須生成簡答題，需要簡短的文字回答。
+如果要求是「申論題」，就必須生成需要較長篇幅回答的開放式問題。
+
+請嚴格按照以下格式輸出每個題目和答案：
+
+題目1：[題目內容]
+答案1：[答案內容]
+
+題目2：[題目內容]
+答案2：[答案內容]
+
+...以此類推
+
+請確保題號和答案號一一對應，不要使用其他格式。內容如下：
+{text}""",
+    "簡體中文": """你是一位专业的出题者，请根据以下内容，设计 {n} 题以下类型的题目：{types}。
+
+请注意：你必须严格遵循指定的题型，如果要求是「单选选择题」，就必须生成单选题，每题有四个选项(A,B,C,D)，而且只有一个正确答案。
+如果要求是「多选选择题」，就必须生成多选题，每题有四到五个选项，可以有多个正确答案。
+如果要求是「问答题」，就必须生成简答题，需要简短的文字回答。
+如果要求是「申论题」，就必须生成需要较长篇幅回答的开放式问题。
+
+请严格按照以下格式输出每个题目和答案：
+
+题目1：[题目内容]
+答案1：[答案内容]
+
+题目2：[题目内容]
+答案2：[答案内容]
+
+...以此类推
+
+请确保题号和答案号一一对应，不要使用其他格式。内容如下：
+{text}""",
+    "English": """You are a professional exam writer. Based on the following content, generate {n} questions of types: {types}.
+
+IMPORTANT: You must strictly follow the specified question types:
+- If "single choice question" is requested, create multiple choice questions with four options (A,B,C,D) and only ONE correct answer.
+- If "multiple choice question" is requested, create questions with 4-5 options where MORE THAN ONE option can be correct.
+- If "short answer" is requested, create questions requiring brief text responses.
+- If "essay question" is requested, create open-ended questions requiring longer responses.
+
+Please strictly follow this format for each question and answer:
+
+Question1: [question content]
+Answer1: [answer content]
+
+Question2: [question content]
+Answer2: [answer content]
+
+...and so on
+
+Ensure that question numbers and answer numbers correspond exactly. Do not use any other format. Content:
+{text}""",
+    "日本語": """あなたはプロの出題者です。以下の内容に基づいて、{types}を含む{n}問の問題を作成してください。
+
+重要：指定された問題タイプを厳守してください：
+- 「四択問題」が要求された場合、4つの選択肢（A,B,C,D）があり、正解が1つだけの選択問題を作成してください。
+- 「複数選択問題」が要求された場合、4〜5つの選択肢があり、複数の正解がある問題を作成してください。
+- 「短答式問題」が要求された場合、簡潔な文章での回答が必要な問題を作成してください。
+- 「記述式問題」が要求された場合、より長い回答が必要な開放型の問題を作成してください。
+
+以下の形式で各問題と回答を出力してください：
+
+問題1：[問題内容]
+回答1：[回答内容]
+
+問題2：[問題内容]
+回答2：[回答内容]
+
+...など
+
+問題番号と回答番号が正確に対応していることを確認してください。他の形式は使用しないでください。内容：
+{text}"""
+})
+
+# 提示詞目錄（可選）：放置 <lang_key>.txt（如 zh-Hant.txt、en.txt）覆蓋預設提示詞，修改後免重啟即生效
+PROMPT_DIR = os.getenv("PDF2QUIZ_PROMPT_DIR")
+# 檢查提示詞檔案是否變更的最短間隔（秒），避免每個請求都讀取磁碟
+PROMPT_RELOAD_INTERVAL = float(os.getenv("PDF2QUIZ_PROMPT_RELOAD_INTERVAL", "2"))
+
+_registry = None
+_registry_signature = None
+_last_check = 0.0
+_lock = threading.Lock()
+_formatter = string.Formatter()
+# 重複題型可組出無限多種組合，限制快取大小
+_FALLBACK_MAX = 256
+
+# ✅ 檢查與預先編譯提示詞
+
+def _validate_tables():
+    for t, names in TYPE_MAP.items():
+        missing = set(LANG_KEY_MAP.values()) - set(names.keys())
+        if missing:
+            raise ValueError(f"題型 {t} 缺少語言：{', '.join(sorted(missing))}")
+
+
+def _validate_prompt(lang, template):
+    try:
+        fields = {field for _, field, _, _ in _formatter.parse(template) if field is not None}
+    except ValueError as e:
+        raise ValueError(f"{lang} 提示詞格式錯誤：{str(e)}")
+    missing = {"n", "types", "text"} - fields
+    if missing:
+        raise ValueError(f"{lang} 提示詞缺少欄位：{', '.join(sorted(missing))}")
+    unknown = fields - {"n", "types", "text"}
+    if unknown:
+        raise ValueError(f"{lang} 提示詞含有未知欄位：{', '.join(sorted(unknown))}")
+
+
+def _escape(s):
+    return s.replace("{", "{{").replace("}", "}}")
+
+
+def _compile(template, lang, types):
+    # 先填入題型字串，保留 {n} 與 {text} 於每次請求時填入
+    types_str = "、".join([TYPE_MAP[t][LANG_KEY_MAP[lang]] for t in types])
+    parts = []
+    for literal, field, spec, conv in _formatter.parse(template):
+        parts.append(_escape(literal))
+        if field is None:
+            continue
+        if field == "types":
+            parts.append(_escape(format(_formatter.convert_field(types_str, conv), spec)))
+        else:
+            parts.append("{" + field + ("!" + conv if conv else "") + (":" + spec if spec else "") + "}")
+    return "".join(parts)
+
+
+def _build_registry(prompts):
+    _validate_tables()
+    for lang in VALID_LANGS:
+        if lang not in prompts:
+            raise ValueError(f"缺少 {lang} 提示詞")
+        _validate_prompt(lang, prompts[lang])
+
+    # 依題型順序預先編譯所有 (語言, 題型組合)
+    compiled = {}
+    for lang in VALID_LANGS:
+        for size in range(1, len(VALID_TYPES) + 1):
+            for types in combinations(VALID_TYPES, size):
+                template = _compile(prompts[lang], lang, types)
+                # 試填一次，提早發現 {n:abc}、{text!x} 等格式錯誤
+                try:
+                    template.format(n=1, text="")
+                except (KeyError, IndexError, ValueError, TypeError) as e:
+                    raise ValueError(f"{lang} 提示詞格式錯誤：{str(e)}")
+                compiled[(lang, types)] = template
+    return MappingProxyType({
+        "prompts": MappingProxyType(dict(prompts)),
+        "compiled": MappingProxyType(compiled),
+        # 非標準順序或重複的題型組合，於首次使用時編譯，隨 registry 一併替換
+        "fallback": {}
+    })
+
+
+def _prompt_dir_signature():
+    if not PROMPT_DIR or not os.path.isdir(PROMPT_DIR):
+        return None
+    signature = []
+    for lang_key in LANG_KEY_MAP.values():
+        path = os.path.join(PROMPT_DIR, f"{lang_key}.txt")
+        if os.path.isfile(path):
+            signature.append((lang_key, os.stat(path).st_mtime_ns))
+    return tuple(signature)
+
+
+def reload_prompts():
+    """從 PROMPT_DIR 重新載入提示詞；檔案有誤時保留原本的提示詞。"""
+    global _registry, _registry_signature
+    with _lock:
+        signature = None
+        try:
+            signature = _prompt_dir_signature()
+            prompts = dict(DEFAULT_PROMPTS)
+            for lang, lang_key in LANG_KEY_MAP.items():
+                path = os.path.join(PROMPT_DIR, f"{lang_key}.txt") if signature else None
+                if path and os.path.isfile(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        prompts[lang] = f.read()
+            registry = _build_registry(prompts)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            if _registry is None:
+                raise
+            logger.error(f"提示詞重新載入失敗，沿用原本的提示詞: {str(e)}")
+            # 讀取簽章失敗時為 None，下次檢查會再重試
+            _registry_signature = signature
+            return _registry
+        _registry = registry
+        _registry_signature = signature
+        if signature:
+            logger.info(f"已載入提示詞檔案: {PROMPT_DIR} ({len(signature)} 個)")
+        return _registry
+
+
+def get_registry():
+    global _last_check
+    if PROMPT_DIR:
+        now = time.monotonic()
+        if now - _last_check >= PROMPT_RELOAD_INTERVAL:
+            _last_check = now
+            try:
+                changed = _prompt_dir_signature() != _registry_signature
+            except OSError:
+                # 檔案正在被替換，交由 reload_prompts 處理並記錄
+                changed = True
+            if changed:
+                reload_prompts()
+    return _registry
+
+# ✅ 請求檢查（UI 與 API 共用）
+
+@lru_cache(maxsize=256)
+def _parse_question_types(question_types):
+    if isinstance(question_types, str):
+        # 先用逗號分隔，再用頓號分隔
+        qt_list = []
+        for part in question_types.split(","):
+            for subpart in part.split("、"):
+                if subpart.strip():
+                    qt_list.append(subpart.strip())
+        return tuple(qt_list)
+    return question_types
+
+
+@lru_cache(maxsize=256)
+def _validate_request(question_types, lang):
+    if lang not in LANG_KEY_MAP:
+        raise ValueError(f"⚠️ 無效的語言：{lang}。有效語言為：{', '.join(VALID_LANGS)}")
+    types = _parse_question_types(question_types)
+    for t in types:
+        if t not in TYPE_MAP:
+            raise ValueError(f"⚠️ 無效的題型：{t}。有效題型為：{', '.join(VALID_TYPES)}")
+    return lang, types
+
+
+def validate_request(question_types, lang):
+    """檢查語言與題型，回傳 (lang, 題型 tuple)；無效時拋出 ValueError。
+
+    question_types 可為字串（API，以逗號或頓號分隔）或列表（Gradio）。
+    """
+    if question_types is None:
+        question_types = ()
+    elif not isinstance(question_types, str):
+        question_types = tuple(question_types)
+    return _validate_request(question_types, lang)
+
+# ✅ 組合提示詞
+
+def build_prompt_template(lang, types):
+    registry = get_registry()
+    compiled = registry["compiled"].get((lang, types))
+    if compiled is None:
+        compiled = registry["fallback"].get((lang, types))
+        if compiled is None:
+            compiled = _compile(registry["prompts"][lang], lang, types)
+            if len(registry["fallback"]) < _FALLBACK_MAX:
+                registry["fallback"][(lang, types)] = compiled
+    return compiled
+
+
+def build_prompt(question_types, lang, num_questions, text):
+    lang, types = validate_request(question_types, lang)
+    return build_prompt_template(lang, types).format(n=num_questions, text=text)
+
+
+def types_label(question_types, lang):
+    lang, types = validate_request(question_types, lang)
+    return "、".join([TYPE_MAP[t][LANG_KEY_MAP[lang]] for t in types])
+
+
+# 啟動時檢查一次並預先編譯
+reload_prompts()